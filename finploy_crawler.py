@@ -8,13 +8,21 @@ import asyncio
 import gzip
 import os
 import re
+import time
+from collections import deque
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
-from typing import Optional, Dict, List, Set, Any
-from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+from typing import Optional, Dict, List, Set
+from urllib.parse import urljoin, urlparse, urlunparse, urlsplit, urlunsplit, parse_qsl, urlencode
 from datetime import datetime
-from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape as xml_escape
 import os as _os
 
+import httpx
+import xxhash
+from selectolax.lexbor import LexborHTMLParser
 from playwright.async_api import async_playwright, TimeoutError as PWTimeout
 
 # ---------- CONFIG ----------
@@ -24,18 +32,28 @@ OUTPUT_DIR = Path("output_sitemaps")
 
 CONCURRENT_PAGES = 8      # number of parallel Playwright pages
 MAX_PAGES = 300000        # stop after this many unique pages (set high)
-NAV_TIMEOUT = 45000       # milliseconds
-SCROLL_PAUSE = 0.7        # seconds between scrolls
+NAV_TIMEOUT = 15000       # milliseconds
 CLICK_RETRY_LIMIT = 12    # how many times to click "View More" before giving up
-REQUEST_DELAY = 0.25      # seconds delay between page navigations per worker
+MIN_HOST_INTERVAL = 0.25  # seconds between navigations to the same host
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36 FinployCrawler/1.0"
+VIEWPORT = {"width": 1366, "height": 900}
 
-# Common CSS/text selectors for "view more" type buttons
+# Resource types we never need for URL discovery; aborted at the route level
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+
+# Analytics/tracking endpoints: pure waste for a link crawler
+_RE_BLOCKED_URL = re.compile(r"google-analytics|googletagmanager|doubleclick|gtag|segment\.(?:io|com)|hotjar|facebook\.net")
+
+# Static fast path: probe with plain HTTP first; fall back to Playwright only
+# when the page looks like a JS app that needs rendering
+STATIC_FIRST = True
+STATIC_TIMEOUT = 10.0          # seconds for the plain-HTTP probe
+STATIC_MAX_BYTES = 2_000_000   # bodies above this go to the renderer instead
+HTTP_MAX_CONNECTIONS = 64
+
+# Common CSS selectors for "view more" type buttons, combined into a single
+# comma-separated selector so each click cycle costs one CDP query
 VIEW_MORE_SELECTORS = [
-    "text=View More",
-    "text=Show More",
-    "text=More",
-    "text=Load more",
-    "text=See more",
     "button[aria-label*='more' i]",
     "button[aria-label*='load' i]",
     ".view-more",
@@ -48,6 +66,63 @@ VIEW_MORE_SELECTORS = [
     "[data-load-more]",
     "[data-more]",
 ]
+VIEW_MORE_CSS = ",".join(VIEW_MORE_SELECTORS)
+# Text-matched buttons (was a batch of text= selectors) in one regex locator
+_RE_VIEW_MORE_TEXT = re.compile(r"view more|show more|load more|see more", re.I)
+
+# One big scroll, then wait until the anchor count stabilizes (MutationObserver)
+# or 3s passes — bounded by real content arrival instead of fixed sleeps
+SCROLL_SETTLE_JS = """async () => {
+    window.scrollTo(0, document.body.scrollHeight);
+    await new Promise(resolve => {
+        let lastCount = document.querySelectorAll('a[href]').length;
+        let stable = 0;
+        let sawMutation = false;
+        const obs = new MutationObserver(() => {
+            sawMutation = true;
+            const c = document.querySelectorAll('a[href]').length;
+            if (c === lastCount) {
+                if (++stable >= 3) { obs.disconnect(); resolve(); }
+            } else {
+                stable = 0;
+                lastCount = c;
+            }
+        });
+        obs.observe(document.body, {childList: true, subtree: true});
+        // quiet pages never fire the observer: bail out fast instead of
+        // waiting the full cap
+        setTimeout(() => { if (!sawMutation) { obs.disconnect(); resolve(); } }, 400);
+        setTimeout(() => { obs.disconnect(); resolve(); }, 3000);
+    });
+}"""
+
+# Single-round-trip DOM extraction: returns all link sources in one object
+EXTRACT_JS = """() => {
+    const anchors = [...document.querySelectorAll('a[href]')].map(n => n.href);
+    const dataLinks = [...document.querySelectorAll('[data-url],[data-href],[data-link],[data-target-url]')]
+        .map(n => n.getAttribute('data-url') || n.getAttribute('data-href') || n.getAttribute('data-link') || n.getAttribute('data-target-url'))
+        .filter(Boolean);
+    const onclicks = [...document.querySelectorAll('[onclick]')].map(n => n.getAttribute('onclick')).filter(Boolean);
+    // regex-scan scripts in-page so only the matches cross CDP, not whole
+    // framework bundles
+    const rx1 = /https?:\\/\\/[^\\s'"]+/g;
+    const rx2 = /['"]\\/(?:api|ajax|data|jobs|search)[^'"]+['"]/g;
+    const scriptMatches = [...document.querySelectorAll('script')].flatMap(s => {
+        const t = s.textContent || '';
+        return [...t.matchAll(rx1)].map(m => m[0]).concat([...t.matchAll(rx2)].map(m => m[0]));
+    });
+    const canonicalEl = document.querySelector('link[rel=canonical]');
+    const canonical = canonicalEl ? canonicalEl.href : null;
+    return {anchors, dataLinks, onclicks, scriptMatches, canonical};
+}"""
+
+# Compiled once: these run inside nested per-page loops
+_RE_ABS_URL = re.compile(r"https?://[^\s'\"]+")
+_RE_REL_QUOTED = re.compile(r"['\"](/[^'\"]+)['\"]")
+_RE_API_PATH = re.compile(r"['\"](/(?:api|ajax|data|jobs|search)[^'\"]+)['\"]")
+
+# Telltale SPA bootstrap markers: pages matching these need a real renderer
+_RE_SPA_MARKER = re.compile(r"id=[\"'](?:root|app|__next)[\"']|window\.__NUXT__|ng-version=", re.I)
 
 # Sitemap limits
 MAX_URLS_PER_SITEMAP = 50000
@@ -64,87 +139,322 @@ SEED_URLS = [
 # ---------- Frontier (In-Memory, No DB) ----------
 
 
+# 64-bit non-cryptographic fingerprint: plenty for URL dedup at 300k URLs
+# (birthday-collision odds are negligible) and far cheaper to store/compare
+# than full URL strings
+def _url_fp(url: str) -> int:
+    return xxhash.xxh3_64_intdigest(url.encode("utf-8"))
+
+
+# Crawl timestamp cached at 1s resolution: datetime.utcnow().strftime() per
+# mark_seen is surprisingly expensive at 300k calls, and sitemap lastmod
+# doesn't need sub-second precision
+_NOW_ISO = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+async def _ts_tick():
+    global _NOW_ISO
+    while True:
+        _NOW_ISO = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        await asyncio.sleep(1)
+
+
 class MemoryFrontier:
+    """Lock-free frontier: asyncio is single-threaded, so plain set/deque
+    operations need no synchronization and avoid await-point overhead.
+
+    Dedup sets hold 64-bit xxh3 fingerprints rather than URL strings; the
+    full URL is kept only in the queue and in the seen rows needed for
+    sitemap output.
+    """
+
     def __init__(self):
-        self.lock = asyncio.Lock()
-        self._queue: asyncio.Queue = asyncio.Queue()
-        self._enqueued: Set[str] = set()
-        self._seen: Dict[str, Dict[str, Any]] = {}
-        self._seen_order: List[str] = []
+        self._queue: deque = deque()
+        self._enqueued: Set[int] = set()
+        self._seen: Set[int] = set()
+        self._seen_rows: List[tuple] = []
 
     @classmethod
-    async def create(cls):
+    def create(cls):
         return cls()
 
-    async def enqueue_if_new(self, url: str):
-        async with self.lock:
-            if url in self._enqueued or url in self._seen:
-                return
-            self._enqueued.add(url)
-            self._queue.put_nowait(url)
+    def enqueue_if_new(self, url: str):
+        h = _url_fp(url)
+        if h in self._enqueued or h in self._seen:
+            return
+        self._enqueued.add(h)
+        self._queue.append(url)
+
+    def enqueue_many(self, urls: Set[str]):
+        for url in urls:
+            h = _url_fp(url)
+            if h in self._enqueued or h in self._seen:
+                continue
+            self._enqueued.add(h)
+            self._queue.append(url)
 
-    async def dequeue(self):
+    def dequeue(self):
         try:
-            return self._queue.get_nowait()
-        except asyncio.QueueEmpty:
+            return self._queue.popleft()
+        except IndexError:
             return None
 
-    async def mark_seen(self, url: str, status_code: Optional[int] = None, last_modified: Optional[str] = None):
-        async with self.lock:
-            if url not in self._seen:
-                self._seen_order.append(url)
-            self._seen[url] = {
-                "status_code": status_code,
-                "last_modified": last_modified,
-                "crawled_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
-            }
+    def mark_seen(self, url: str, status_code: Optional[int] = None, last_modified: Optional[str] = None):
+        h = _url_fp(url)
+        if h in self._seen:
+            return
+        self._seen.add(h)
+        self._seen_rows.append((url, last_modified, _NOW_ISO))
 
-    async def is_seen(self, url: str) -> bool:
-        return url in self._seen
+    def is_seen(self, url: str) -> bool:
+        return _url_fp(url) in self._seen
 
-    async def seen_count(self) -> int:
+    def seen_count(self) -> int:
         return len(self._seen)
 
-    async def queue_count(self) -> int:
-        return self._queue.qsize()
+    def queue_count(self) -> int:
+        return len(self._queue)
 
-    async def fetch_all_seen(self):
-        rows = []
-        for url in self._seen_order:
-            meta = self._seen.get(url, {})
-            rows.append((url, meta.get("last_modified"), meta.get("crawled_at")))
-        return rows
+    def fetch_all_seen(self):
+        return list(self._seen_rows)
 
-    async def close_async(self):
+    def close(self):
         return None
 
 # ---------- URL helpers ----------
+# Cached: nav/footer links recur on nearly every page, so hit rate is very
+# high and both positive and None results are worth remembering.
+@lru_cache(maxsize=200_000)
 def normalize_url(url):
     if not url:
         return None
-    parsed = urlparse(url)
+    # fast path: no query or fragment means nothing to strip or re-sort —
+    # the common case for job detail pages
+    if "?" not in url and "#" not in url:
+        return url if url.startswith(("http://", "https://")) else None
+    parsed = urlsplit(url)
     if parsed.scheme not in ("http", "https"):
         return None
-    # drop fragments
-    fragment_free = parsed._replace(fragment="")
-    # remove utm_* query params and session ids heuristically
-    qs = [(k, v) for (k, v) in parse_qsl(fragment_free.query, keep_blank_values=True)
-          if not (k.startswith("utm_") or k.lower() in ("sessionid", "sid", "phpsessid"))]
-    qs.sort()
-    cleaned = fragment_free._replace(query=urlencode(qs, doseq=True))
-    return urlunparse(cleaned)
-
+    # drop fragments; remove utm_* query params and session ids heuristically
+    query = parsed.query
+    if query:
+        qs = [(k, v) for (k, v) in parse_qsl(query, keep_blank_values=True)
+              if not (k.startswith("utm_") or k.lower() in ("sessionid", "sid", "phpsessid"))]
+        qs.sort()
+        query = urlencode(qs, doseq=True)
+    return urlunsplit((parsed.scheme, parsed.netloc, parsed.path, query, ""))
+
+def host_of(url):
+    # hot path: slice the host out directly rather than paying for a full
+    # urlparse just to read netloc; the authority ends at the first of
+    # '/', '?' or '#' (e.g. https://www.finploy.com?page=2 has no path)
+    i = url.find("://")
+    if i < 0:
+        return ""
+    start = i + 3
+    end = len(url)
+    for sep in "/?#":
+        k = url.find(sep, start)
+        if 0 <= k < end:
+            end = k
+    return url[start:end].lower()
+
+@lru_cache(maxsize=50_000)
 def is_allowed(url):
+    return host_of(url) in ALLOWED_HOSTS
+
+# ---------- Per-host politeness ----------
+# Requests to the same host are spaced by MIN_HOST_INTERVAL; different hosts
+# (e.g. .com vs .co.uk) proceed at full speed in parallel.
+_host_locks: Dict[str, asyncio.Lock] = {}
+_host_last_request: Dict[str, float] = {}
+
+async def throttle_host(url):
+    host = host_of(url)
+    lock = _host_locks.setdefault(host, asyncio.Lock())
+    async with lock:
+        now = time.monotonic()
+        wait = _host_last_request.get(host, 0.0) + MIN_HOST_INTERVAL - now
+        if wait > 0:
+            await asyncio.sleep(wait)
+        _host_last_request[host] = time.monotonic()
+
+# ---------- Sitemap/robots seeding ----------
+MAX_SITEMAP_FETCHES = 50  # safety cap on nested sitemap-index expansion
+
+async def seed_from_site(frontier, client):
+    """
+    Seed the frontier from robots.txt Sitemap: directives and the site's
+    published sitemap.xml(.gz) — a near-complete URL list in a few fetches,
+    replacing thousands of discovery-only page renders.
+    """
+    base = START_URL.rstrip("/")
+    sitemap_queue = deque()
+    try:
+        resp = await client.get(base + "/robots.txt", timeout=STATIC_TIMEOUT, follow_redirects=True)
+        if resp.status_code < 400:
+            for line in resp.text.splitlines():
+                if line.lower().startswith("sitemap:"):
+                    sitemap_queue.append(line.split(":", 1)[1].strip())
+    except Exception:
+        pass
+    sitemap_queue.append(base + "/sitemap.xml")
+    sitemap_queue.append(base + "/sitemap.xml.gz")
+
+    fetched = set()
+    seeded = 0
+    while sitemap_queue and len(fetched) < MAX_SITEMAP_FETCHES:
+        sm_url = sitemap_queue.popleft()
+        if sm_url in fetched:
+            continue
+        fetched.add(sm_url)
+        try:
+            resp = await client.get(sm_url, timeout=STATIC_TIMEOUT, follow_redirects=True)
+        except Exception:
+            continue
+        if resp.status_code >= 400:
+            continue
+        body = resp.content
+        if body[:2] == b"\x1f\x8b":
+            try:
+                body = gzip.decompress(body)
+            except Exception:
+                continue
+        try:
+            is_index = False
+            for event, el in iterparse(BytesIO(body), events=("start", "end")):
+                tag = el.tag.rsplit("}", 1)[-1]
+                if event == "start":
+                    if tag in ("sitemapindex", "urlset"):
+                        is_index = tag == "sitemapindex"
+                    continue
+                if tag == "loc" and el.text:
+                    loc = el.text.strip()
+                    if is_index:
+                        sitemap_queue.append(loc)
+                    else:
+                        n = normalize_url(loc)
+                        if n and is_allowed(n):
+                            frontier.enqueue_if_new(n)
+                            seeded += 1
+                el.clear()
+        except Exception:
+            continue
+    if seeded:
+        print(f"Seeded {seeded} urls from {len(fetched)} sitemap fetch(es)")
+
+# ---------- Static fast path ----------
+async def fetch_static(client, url):
+    """
+    Fetch a page over plain HTTP. Returns (html, response); html is None when
+    the page needs a real renderer (error, non-HTML, oversized, SPA markers).
+    """
     try:
-        parsed = urlparse(url)
-        host = parsed.netloc.lower()
-        if host in ALLOWED_HOSTS:
-            return True
-    except:
-        return False
-    return False
+        resp = await client.get(url, timeout=STATIC_TIMEOUT, follow_redirects=True)
+    except Exception:
+        return None, None
+    if resp.status_code >= 400:
+        return None, resp
+    if "html" not in resp.headers.get("content-type", ""):
+        return None, resp
+    if len(resp.content) > STATIC_MAX_BYTES:
+        return None, resp
+    html = resp.text
+    if _RE_SPA_MARKER.search(html):
+        return None, resp
+    return html, resp
+
+def extract_from_static_html(html, url):
+    """Extract discovered URLs from server-rendered HTML without a browser.
+
+    Uses selectolax's Lexbor engine — a C HTML5 parser, much faster than
+    lxml or html.parser on this byte-pushing path.
+    """
+    discovered = set()
+    try:
+        tree = LexborHTMLParser(html)
+    except Exception:
+        return discovered
+
+    for node in tree.css("a[href]"):
+        h = node.attributes.get("href")
+        if not h:
+            continue
+        n = normalize_url(urljoin(url, h))
+        if n and is_allowed(n):
+            discovered.add(n)
+
+    for node in tree.css("[data-url],[data-href],[data-link],[data-target-url]"):
+        attrs = node.attributes
+        h = attrs.get("data-url") or attrs.get("data-href") or attrs.get("data-link") or attrs.get("data-target-url")
+        if not h:
+            continue
+        full = h if h.startswith("http") else urljoin(url, h)
+        n = normalize_url(full)
+        if n and is_allowed(n):
+            discovered.add(n)
+
+    for node in tree.css("[onclick]"):
+        script = node.attributes.get("onclick")
+        if not script:
+            continue
+        for m in _RE_ABS_URL.findall(script):
+            n = normalize_url(m)
+            if n and is_allowed(n):
+                discovered.add(n)
+        for m in _RE_REL_QUOTED.findall(script):
+            n = normalize_url(urljoin(url, m))
+            if n and is_allowed(n):
+                discovered.add(n)
+
+    for node in tree.css("script"):
+        s = node.text()
+        if not s:
+            continue
+        for m in _RE_API_PATH.findall(s):
+            n = normalize_url(urljoin(url, m))
+            if n and is_allowed(n):
+                discovered.add(n)
+
+    expand_pagination(discovered)
+    return discovered
 
 # ---------- Crawler ----------
+PAGINATION_LOOKAHEAD = 5  # speculative ?page=N+1..N+5 per paginated endpoint
+
+# Highest page number already expanded per endpoint (URL minus its page
+# param), so each pagination sequence is explored forward once per crawl
+# instead of re-expanding from every page that links into it
+_max_page_expanded: Dict[str, int] = {}
+
+def expand_pagination(discovered):
+    """If we saw ?page=N links, speculatively add the next few pages."""
+    try:
+        page_links = [h for h in list(discovered) if "page=" in h]
+        additions = set()
+        for pl in page_links:
+            parsed = urlparse(pl)
+            new_qs = dict(parse_qsl(parsed.query, keep_blank_values=True))
+            if "page" not in new_qs or not new_qs["page"].isdigit():
+                continue
+            base_num = int(new_qs["page"])
+            key_qs = sorted((k, v) for k, v in new_qs.items() if k != "page")
+            key = urlunparse(parsed._replace(query=urlencode(key_qs)))
+            already = _max_page_expanded.get(key, 0)
+            if base_num <= already:
+                continue
+            upper = base_num + PAGINATION_LOOKAHEAD
+            for num in range(max(base_num + 1, already + 1), upper + 1):
+                new_qs["page"] = str(num)
+                new_url = urlunparse(parsed._replace(query=urlencode(new_qs)))
+                n = normalize_url(new_url)
+                if n and is_allowed(n):
+                    additions.add(n)
+            if upper > already:
+                _max_page_expanded[key] = upper
+        discovered.update(additions)
+    except Exception:
+        pass
+
 async def render_and_extract(page, url):
     """
     Navigate, scroll, click "view more" buttons, and return set of discovered URLs (normalized).
@@ -152,230 +462,262 @@ async def render_and_extract(page, url):
     discovered = set()
     nav_response = None
     try:
-        nav_response = await page.goto(url, wait_until="networkidle", timeout=NAV_TIMEOUT)
+        # domcontentloaded is enough for link extraction; networkidle stalls
+        # on analytics beacons and ads for the full timeout
+        nav_response = await page.goto(url, wait_until="domcontentloaded", timeout=NAV_TIMEOUT)
+        # short settle so JS-injected anchors have a chance to render
+        await page.wait_for_timeout(300)
     except PWTimeout:
         # try again but continue
         print("Timeout loading", url)
     except Exception as e:
         print("Navigation error:", e, url)
-        return discovered
+        return discovered, None
 
-    # optional: check canonical link and prefer it
+    # Single scroll to bottom; wait bounded on actual lazy-load activity
     try:
-        canonical = await page.eval_on_selector("link[rel=canonical]", "el => el.href", strict=False)
-        if canonical:
-            cn = normalize_url(canonical)
-            if cn:
-                discovered.add(cn)
+        await page.evaluate(SCROLL_SETTLE_JS)
     except Exception:
         pass
 
-    # Scroll to bottom repeatedly to trigger lazy-load
-    try:
-        previous_height = None
-        for _ in range(8):
-            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await asyncio.sleep(SCROLL_PAUSE)
-            cur_height = await page.evaluate("document.body.scrollHeight")
-            if cur_height == previous_height:
+    # Click "View More" / "Load More" buttons until they disappear or up to a
+    # limit — one compound-selector query per cycle, not one per selector
+    for attempt in range(CLICK_RETRY_LIMIT):
+        try:
+            target = page.locator(VIEW_MORE_CSS).first
+            if await target.count() == 0:
+                target = page.get_by_text(_RE_VIEW_MORE_TEXT).first
+                if await target.count() == 0:
+                    break
+            if not await target.is_visible():
                 break
-            previous_height = cur_height
-    except Exception:
-        pass
-
-    # Click "View More" / "Load More" buttons until they disappear or up to a limit
-    for selector in VIEW_MORE_SELECTORS:
-        for attempt in range(CLICK_RETRY_LIMIT):
             try:
-                el = await page.query_selector(selector)
-                if not el:
-                    break
-                if not await el.is_visible():
-                    break
-                try:
-                    await el.click(timeout=5000)
-                except Exception:
-                    await page.evaluate("(el) => el.click()", el)
-                await asyncio.sleep(0.8)
+                await target.click(timeout=5000)
             except Exception:
-                break
+                await target.evaluate("el => el.click()")
+            await asyncio.sleep(0.8)
+        except Exception:
+            break
 
-    # Extract anchors (absolute hrefs)
+    # Pull everything (canonical, anchors, data-* links, onclick handlers,
+    # inline scripts) in one evaluate — one CDP round-trip instead of five
     try:
-        hrefs = await page.eval_on_selector_all("a[href]", "nodes => nodes.map(n => n.href)")
-        for h in hrefs:
-            n = normalize_url(h)
+        extracted = await page.evaluate(EXTRACT_JS)
+    except Exception as e:
+        print("Extraction failed:", e)
+        extracted = {}
+
+    canonical = extracted.get("canonical")
+    if canonical:
+        cn = normalize_url(canonical)
+        if cn:
+            discovered.add(cn)
+
+    for h in extracted.get("anchors", []):
+        n = normalize_url(h)
+        if n and is_allowed(n):
+            discovered.add(n)
+
+    for h in extracted.get("dataLinks", []):
+        full = h if h.startswith("http") else urljoin(url, h)
+        n = normalize_url(full)
+        if n and is_allowed(n):
+            discovered.add(n)
+
+    for script in extracted.get("onclicks", []):
+        if not script:
+            continue
+        for m in _RE_ABS_URL.findall(script):
+            n = normalize_url(m)
             if n and is_allowed(n):
                 discovered.add(n)
-    except Exception as e:
-        print("Anchor extraction failed:", e)
-
-    # Extract from data-* attributes commonly used for lazy links
-    try:
-        data_links = await page.eval_on_selector_all(
-            "[data-url],[data-href],[data-link],[data-target-url]",
-            "nodes => nodes.map(n => n.getAttribute('data-url') || n.getAttribute('data-href') || n.getAttribute('data-link') || n.getAttribute('data-target-url')).filter(Boolean)"
-        )
-        for h in data_links:
-            full = h if h.startswith("http") else urljoin(url, h)
+        for m in _RE_REL_QUOTED.findall(script):
+            full = urljoin(url, m)
             n = normalize_url(full)
             if n and is_allowed(n):
                 discovered.add(n)
-    except Exception:
-        pass
 
-    # Extract URLs from onclick handlers
-    try:
-        onclicks = await page.eval_on_selector_all("[onclick]", "nodes => nodes.map(n => n.getAttribute('onclick'))")
-        for script in onclicks:
-            if not script:
-                continue
-            for m in re.findall(r"https?://[^\s'\"]+", script):
-                n = normalize_url(m)
-                if n and is_allowed(n):
-                    discovered.add(n)
-            for m in re.findall(r"['\"](/[^'\"]+)['\"]", script):
-                full = urljoin(url, m)
-                n = normalize_url(full)
-                if n and is_allowed(n):
-                    discovered.add(n)
-    except Exception:
-        pass
-
-    # Extract potential endpoints from inline scripts
-    try:
-        scripts_text = await page.eval_on_selector_all("script", "nodes => nodes.map(n => n.innerText || '')")
-        for s in scripts_text:
-            if not s:
-                continue
-            for m in re.findall(r"['\"](/(?:api|ajax|data|jobs|search)[^'\"]+)['\"]", s):
-                full = urljoin(url, m)
-                n = normalize_url(full)
-                if n and is_allowed(n):
-                    discovered.add(n)
-    except Exception:
-        pass
+    for m in extracted.get("scriptMatches", []):
+        if m.startswith(("'", '"')):
+            # rx2 matches keep their quotes: strip and resolve the path
+            n = normalize_url(urljoin(url, m.strip("'\"")))
+        else:
+            n = normalize_url(m)
+        if n and is_allowed(n):
+            discovered.add(n)
 
-    # Heuristic pagination expansion: if we saw ?page=N, add next few pages
-    try:
-        page_links = [h for h in list(discovered) if "page=" in h]
-        for pl in page_links:
-            parsed = urlparse(pl)
-            qs = parse_qsl(parsed.query, keep_blank_values=True)
-            new_qs = dict(qs)
-            if "page" in new_qs and new_qs["page"].isdigit():
-                base_num = int(new_qs["page"])
-                for inc in range(1, 6):
-                    new_qs["page"] = str(base_num + inc)
-                    new_url = urlunparse(parsed._replace(query=urlencode(new_qs)))
-                    n = normalize_url(new_url)
-                    if n and is_allowed(n):
-                        discovered.add(n)
-    except Exception:
-        pass
+    expand_pagination(discovered)
 
     return discovered, nav_response
 
-async def worker(name, frontier, browser):
-    page = await browser.new_page()
+async def _route_handler(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    elif route.request.resource_type != "document" and _RE_BLOCKED_URL.search(route.request.url):
+        # never abort main-frame navigations: an allowed-host URL that
+        # happens to contain a tracker substring must still be crawlable
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def worker(name, frontier, browser, client):
+    # one isolated context per worker: separate cookies/storage and lets
+    # Chromium spread renderer work across processes
+    context = await browser.new_context(
+        java_script_enabled=True,
+        viewport=VIEWPORT,
+        user_agent=USER_AGENT,
+    )
+    await context.route("**/*", _route_handler)
+    page = await context.new_page()
     while True:
         # stop condition
-        seen_count = await frontier.seen_count()
+        seen_count = frontier.seen_count()
         if seen_count >= MAX_PAGES:
             print(f"[{name}] reached max pages {seen_count}. exiting.")
             break
 
-        url = await frontier.dequeue()
+        url = frontier.dequeue()
         if url is None:
             # nothing to do; small sleep and check again
             await asyncio.sleep(1)
             # re-check if queue is empty and no progress, then break after small idle
-            qcount = await frontier.queue_count()
-            if qcount == 0:
+            if frontier.queue_count() == 0:
                 print(f"[{name}] queue empty, exiting.")
                 break
             continue
 
-        # double-check not seen
-        if await frontier.is_seen(url):
-            continue
+        # invariant: URLs in the queue are never in _seen — enqueue checks
+        # both sets, and URLs only enter _seen via mark_seen after dequeue
 
         print(f"[{name}] crawling: {url}")
-        discovered, nav_response = await render_and_extract(page, url)
-        # mark seen with metadata
+        await throttle_host(url)
+        discovered = None
         status_code = None
         last_modified = None
-        try:
-            if nav_response is not None:
-                status_code = nav_response.status
-                try:
-                    # headers() returns a dict of response headers
-                    headers = await nav_response.headers()
-                    last_modified = headers.get("last-modified")
-                except Exception:
-                    pass
-        except Exception:
-            pass
-        await frontier.mark_seen(url, status_code=status_code, last_modified=last_modified)
-        # enqueue discovered
-        for u in discovered:
-            if not await frontier.is_seen(u):
-                await frontier.enqueue_if_new(u)
-        await asyncio.sleep(REQUEST_DELAY)
-    await page.close()
+        # most pages are server-rendered HTML: try plain HTTP + selectolax
+        # first, and only pay for a browser render when the probe says we must
+        if STATIC_FIRST:
+            html, resp = await fetch_static(client, url)
+            if resp is not None:
+                status_code = resp.status_code
+                last_modified = resp.headers.get("last-modified")
+                if status_code >= 400:
+                    # terminal: the page is an error (e.g. a speculative
+                    # pagination URL past the last page) — rendering it
+                    # again in a browser buys nothing
+                    frontier.mark_seen(url, status_code=status_code, last_modified=last_modified)
+                    continue
+                ctype = resp.headers.get("content-type", "")
+                if ctype and "html" not in ctype:
+                    # terminal: a definite non-HTML body (PDF, image, the
+                    # .xml.gz sitemaps we enqueue) can't yield links in a
+                    # browser either — goto would just attempt a download.
+                    # Only a missing/ambiguous content-type falls through.
+                    frontier.mark_seen(url, status_code=status_code, last_modified=last_modified)
+                    continue
+            if html is not None:
+                discovered = extract_from_static_html(html, url)
+                if not discovered:
+                    discovered = None  # static extraction failed; render it
+        if discovered is None:
+            discovered, nav_response = await render_and_extract(page, url)
+            try:
+                if nav_response is not None:
+                    status_code = nav_response.status
+                    try:
+                        # headers() returns a dict of response headers
+                        headers = await nav_response.headers()
+                        last_modified = headers.get("last-modified")
+                    except Exception:
+                        pass
+            except Exception:
+                pass
+        frontier.mark_seen(url, status_code=status_code, last_modified=last_modified)
+        # enqueue discovered in one batch, deduped against the fingerprint sets
+        frontier.enqueue_many(discovered)
+    await context.close()
 
 # ---------- Sitemap writer ----------
-async def write_single_sitemap_from_frontier(frontier, outpath=OUTPUT_DIR / "sitemap.xml"):
-    rows = await frontier.fetch_all_seen()
-    if not rows:
-        print("No URLs found to write.")
-        return
-    outpath.parent.mkdir(parents=True, exist_ok=True)
-    now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-    root = Element('urlset', xmlns="http://www.sitemaps.org/schemas/sitemap/0.9")
+XML_DECL = b'<?xml version="1.0" encoding="utf-8"?>\n'
+URLSET_OPEN = b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = b'</urlset>\n'
+
+def _write_urlset(f, rows, now):
+    """Stream one <urlset> to an open binary file without building a tree."""
+    f.write(XML_DECL)
+    f.write(URLSET_OPEN)
     for row in rows:
         u = row[0]
         last_modified = row[1] if len(row) > 1 else None
         crawled_at = row[2] if len(row) > 2 else None
-        url_el = SubElement(root, 'url')
-        loc = SubElement(url_el, 'loc'); loc.text = u
         lm_value = last_modified or (crawled_at if crawled_at else now)
-        lastmod = SubElement(url_el, 'lastmod'); lastmod.text = str(lm_value)
-    with open(outpath, "wb") as f:
-        f.write(tostring(root, encoding="utf-8", xml_declaration=True))
-    print(f"Wrote {len(rows)} urls to {outpath}")
+        f.write(f"<url><loc>{xml_escape(u)}</loc><lastmod>{xml_escape(str(lm_value))}</lastmod></url>\n".encode("utf-8"))
+    f.write(URLSET_CLOSE)
+
+def write_sitemaps_from_frontier(frontier, outdir=OUTPUT_DIR):
+    """Write gzipped 50k-URL sitemap shards plus a sitemap_index.xml."""
+    rows = frontier.fetch_all_seen()
+    if not rows:
+        print("No URLs found to write.")
+        return
+    outdir.mkdir(parents=True, exist_ok=True)
+    now = _NOW_ISO
+    shard_names = []
+    for i in range(0, len(rows), MAX_URLS_PER_SITEMAP):
+        shard_name = f"sitemap-{i // MAX_URLS_PER_SITEMAP + 1}.xml.gz"
+        with gzip.open(outdir / shard_name, "wb", compresslevel=6) as f:
+            _write_urlset(f, rows[i:i + MAX_URLS_PER_SITEMAP], now)
+        shard_names.append(shard_name)
+    index_path = outdir / "sitemap_index.xml"
+    with open(index_path, "wb") as f:
+        f.write(XML_DECL)
+        f.write(b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for name in shard_names:
+            loc = xml_escape(START_URL.rstrip("/") + "/" + name)
+            f.write(f"<sitemap><loc>{loc}</loc><lastmod>{now}</lastmod></sitemap>\n".encode("utf-8"))
+        f.write(b'</sitemapindex>\n')
+    print(f"Wrote {len(rows)} urls across {len(shard_names)} gzipped shard(s); index at {index_path}")
 
 
 # ---------- Main ----------
 async def main():
     # In-memory frontier (no database)
-    frontier = await MemoryFrontier.create()
+    frontier = MemoryFrontier.create()
     print("Using in-memory frontier (no DB)")
     # seed if queue empty
-    qcount = await frontier.queue_count()
-    scount = await frontier.seen_count()
-    if qcount == 0 and scount == 0:
+    if frontier.queue_count() == 0 and frontier.seen_count() == 0:
         # enqueue multiple seeds for breadth-first coverage
         for s in SEED_URLS:
             seed_norm = normalize_url(s)
             if seed_norm:
-                await frontier.enqueue_if_new(seed_norm)
+                frontier.enqueue_if_new(seed_norm)
         print("Seeded with", ", ".join(SEED_URLS))
 
+    client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS),
+        headers={"User-Agent": USER_AGENT},
+    )
+    # seed from the site's own sitemaps before any rendering happens
+    await seed_from_site(frontier, client)
+    ticker = asyncio.create_task(_ts_tick())
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         # create concurrent workers
-        tasks = [asyncio.create_task(worker(f"w{i+1}", frontier, browser)) for i in range(CONCURRENT_PAGES)]
+        tasks = [asyncio.create_task(worker(f"w{i+1}", frontier, browser, client)) for i in range(CONCURRENT_PAGES)]
         try:
             await asyncio.gather(*tasks)
         except KeyboardInterrupt:
             print("Interrupted by user, shutting down...")
         finally:
+            ticker.cancel()
             await browser.close()
-            await frontier.close_async()
+            await client.aclose()
+            frontier.close()
 
-    # write a single sitemap when done (from active backend)
-    await write_single_sitemap_from_frontier(frontier, OUTPUT_DIR / "sitemap.xml")
+    # write gzipped sitemap shards + index when done (from active backend)
+    write_sitemaps_from_frontier(frontier, OUTPUT_DIR)
 
 if __name__ == "__main__":
     asyncio.run(main())